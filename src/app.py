@@ -5,104 +5,444 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse, Response
+from pydantic import BaseModel, EmailStr, Field
+from starlette.datastructures import Headers
+from array import array
+from enum import Enum
+from functools import lru_cache
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import orjson
 import os
+import sqlite3
+import sys
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson's C serializer"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+class SignupIn(BaseModel):
+    """Request body for signing up for an activity"""
+
+    email: EmailStr
+
+
+class BatchSignupIn(BaseModel):
+    """Request body for signing up several students for an activity at once"""
+
+    # Capped, since the whole batch runs while holding the activity's lock
+    emails: list[EmailStr] = Field(max_length=100)
+
+
+class ActivitySummary(BaseModel):
+    """An activity as listed by GET /activities"""
+
+    description: str
+    schedule: str
+    max_participants: int
+    participants_count: int
+    spots_left: int
+
+
+def open_database(path, seed):
+    """Open the SQLite activity store, creating it if needed and syncing it to seed"""
+    # Autocommit mode, so each signup change is its own short transaction
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS activities (
+            name TEXT PRIMARY KEY,
+            description TEXT NOT NULL,
+            schedule TEXT NOT NULL,
+            max_participants INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS signups (
+            activity TEXT NOT NULL REFERENCES activities (name),
+            email TEXT NOT NULL,
+            PRIMARY KEY (activity, email)
+        ) WITHOUT ROWID;
+    """)
+    # The seed is the source of truth for activities: update changed ones and
+    # drop any (with their signups) that are no longer seeded
+    placeholders = ", ".join("?" * len(seed))
+    with db:
+        db.execute("BEGIN")
+        db.executemany(
+            """
+            INSERT INTO activities VALUES (?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                description = excluded.description,
+                schedule = excluded.schedule,
+                max_participants = excluded.max_participants
+            """,
+            [(name, a["description"], a["schedule"], a["max_participants"])
+             for name, a in seed.items()],
+        )
+        db.execute(f"DELETE FROM signups WHERE activity NOT IN ({placeholders})", tuple(seed))
+        db.execute(f"DELETE FROM activities WHERE name NOT IN ({placeholders})", tuple(seed))
+    return db
+
+
+def load_static_files(directory):
+    """Read static files into memory along with precompressed variants
+
+    The static directory only holds a handful of small files, so they are
+    served from memory rather than stat'ed and opened on every request.
+    """
+    directory = Path(directory)
+    static_files = {}
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file():
+            continue
+        name = path.relative_to(directory).as_posix()
+        content = path.read_bytes()
+        # Compress once at max quality, which is too slow to do per request
+        encoded = {}
+        if brotli is not None:
+            encoded["br"] = brotli.compress(content, quality=11)
+        encoded["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+        static_files[name] = {
+            "content": content,
+            "encoded": encoded,
+            "media_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            # Weak, since the same ETag covers every encoding of the file
+            "etag": f'W/"{hashlib.blake2b(content, digest_size=8).hexdigest()}"',
+            # HTML is the entry point, so keep it fresh; asset names aren't
+            # fingerprinted, so they get a day rather than a year
+            "cache_control": "public, max-age=60" if name.endswith(".html")
+            else "public, max-age=86400",
+        }
+    return static_files
+
+
+def accepted_encodings(headers):
+    """Return the content codings the Accept-Encoding header allows
+
+    Codings the client refuses with q=0 are left out.
+    """
+    accepted = set()
+    for token in headers.get("accept-encoding", "").split(","):
+        coding, *params = token.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def etag_matches(headers, etag):
+    """Return whether the If-None-Match header matches etag
+
+    Handles "*" and comma-separated lists, comparing weakly as RFC 9110
+    requires for If-None-Match.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class QualityGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that honors q=0 in Accept-Encoding"""
+
+    async def __call__(self, scope, receive, send):
+        # The stock middleware only checks for "gzip" as a substring
+        if scope["type"] == "http" and "gzip" not in accepted_encodings(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 app = FastAPI(title="Mergington High School API",
-              description="API for viewing and signing up for extracurricular activities")
+              description="API for viewing and signing up for extracurricular activities",
+              default_response_class=ORJSONResponse)
 
-# Mount the static files directory
-current_dir = Path(__file__).parent
-app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
-          "static")), name="static")
+# Compress JSON responses and any static files served uncompressed; static
+# files with a precompressed variant already carry Content-Encoding
+app.add_middleware(QualityGZipMiddleware, minimum_size=500)
 
-# In-memory activity database
-activities = {
+# Load the static files directory into memory
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+_static_files = load_static_files(STATIC_DIR)
+
+# Activity definitions the database is seeded with
+_ACTIVITY_SEED = {
     "Basketball Club": {
         "description": "Play basketball and improve athletic skills",
         "schedule": "Mondays and Wednesdays, 4:00 PM - 5:30 PM",
-        "max_participants": 15,
-        "participants": []
+        "max_participants": 15
     },
     "Tennis Team": {
         "description": "Learn tennis techniques and compete in matches",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 5:00 PM",
-        "max_participants": 10,
-        "participants": []
+        "max_participants": 10
     },
     "Art Studio": {
         "description": "Explore painting, drawing, and sculpture techniques",
         "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
-        "max_participants": 18,
-        "participants": []
+        "max_participants": 18
     },
     "Music Band": {
         "description": "Join the school band and perform in concerts",
         "schedule": "Mondays and Thursdays, 4:00 PM - 5:30 PM",
-        "max_participants": 25,
-        "participants": []
+        "max_participants": 25
     },
     "Debate Team": {
         "description": "Develop argumentation skills and compete in debates",
         "schedule": "Tuesdays, 3:30 PM - 5:00 PM",
-        "max_participants": 16,
-        "participants": []
+        "max_participants": 16
     },
     "Science Club": {
         "description": "Conduct experiments and explore scientific concepts",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
-        "max_participants": 20,
-        "participants": []
+        "max_participants": 20
     }
 }
 
+# Durable store for activities and signups; ":memory:" gives a throwaway one
+_db = open_database(os.environ.get("ACTIVITIES_DB", "activities.db"), _ACTIVITY_SEED)
+
+# In-memory cache of the database, stored as parallel arrays indexed by
+# position so queries only touch the fields they need. Only signup changes
+# are written back
+_rows = _db.execute(
+    "SELECT name, description, schedule, max_participants FROM activities ORDER BY rowid"
+).fetchall()
+# Names are interned so dict lookups keyed on them compare by identity
+_ACTIVITY_NAMES = tuple(sys.intern(row[0]) for row in _rows)
+_DESCRIPTIONS = tuple(row[1] for row in _rows)
+_SCHEDULES = tuple(row[2] for row in _rows)
+_MAX = array("H", (row[3] for row in _rows))
+_PARTICIPANTS: list[set[str]] = [set() for _ in _ACTIVITY_NAMES]
+# One lock per activity so signups for different activities don't contend
+_LOCKS = [asyncio.Lock() for _ in _ACTIVITY_NAMES]
+_NAME_INDEX = {name: idx for idx, name in enumerate(_ACTIVITY_NAMES)}
+# Casefolded name -> canonical name, so lookups ignore the case the client used
+_CASEFOLDED_NAMES = {name.casefold(): name for name in _ACTIVITY_NAMES}
+
+for _activity, _email in _db.execute("SELECT activity, email FROM signups"):
+    _PARTICIPANTS[_NAME_INDEX[_activity]].add(_email)
+
+
+class _ActivityNameEnum(str, Enum):
+    @classmethod
+    def _missing_(cls, value):
+        name = _CASEFOLDED_NAMES.get(str(value).casefold())
+        return None if name is None else cls(name)
+
+
+# Known activity names, used as the path parameter type so unknown names are
+# rejected with a 422 during request validation. Handlers taking one can
+# therefore index _NAME_INDEX directly, as the activity is known to exist
+ActivityName = _ActivityNameEnum("ActivityName", {name: name for name in _ACTIVITY_NAMES})
+
+# sqlite3 caches the prepared statement for each of these
+_INSERT_SIGNUP = "INSERT INTO signups (activity, email) VALUES (?, ?)"
+_DELETE_SIGNUP = "DELETE FROM signups WHERE activity = ? AND email = ?"
+
+# Serialized /activities payload, rebuilt lazily after any signup change
+_activities_cache: bytes | None = None
+# ETag of _activities_cache, computed whenever it is rebuilt
+_activities_etag: str | None = None
+
+
+@lru_cache(maxsize=64)
+def _activity_summary(name, participants_count, max_participants):
+    """Build an activity's /activities entry; the result is shared, don't mutate it"""
+    idx = _NAME_INDEX[name]
+    return ActivitySummary(
+        description=_DESCRIPTIONS[idx],
+        schedule=_SCHEDULES[idx],
+        max_participants=max_participants,
+        participants_count=participants_count,
+        spots_left=max_participants - participants_count,
+    ).model_dump()
+
+
+def _invalidate_activities_cache():
+    global _activities_cache
+    _activities_cache = None
+
+
+# The redirect never changes, so one response object is built up front
+_ROOT_REDIRECT = RedirectResponse(url="/static/index.html", status_code=307)
+
 
 @app.get("/")
-def root():
-    return RedirectResponse(url="/static/index.html")
+async def root():
+    return _ROOT_REDIRECT
 
 
-@app.get("/activities")
-def get_activities():
-    return activities
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_static_file(path: str, request: Request):
+    static_file = _static_files.get(path)
+    if static_file is None:
+        raise HTTPException(status_code=404, detail="Not Found")
 
+    headers = {
+        "Cache-Control": static_file["cache_control"],
+        "ETag": static_file["etag"],
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers, static_file["etag"]):
+        return Response(status_code=304, headers=headers)
 
-@app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str):
-    """Sign up a student for an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+    content = static_file["content"]
+    accepted = accepted_encodings(request.headers)
+    for encoding, encoded in static_file["encoded"].items():
+        if encoding in accepted:
+            headers["Content-Encoding"] = encoding
+            content = encoded
+            break
+    return Response(content=content, media_type=static_file["media_type"], headers=headers)
 
-    # Get the specific activity
-    activity = activities[activity_name]
 
-    # Validate student is not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student already signed up for this activity")
+@app.get("/activities", response_model=dict[str, ActivitySummary])
+async def get_activities(request: Request):
+    global _activities_cache, _activities_etag
+    if _activities_cache is None:
+        # Only participant counts are listed, so the payload stays bounded by
+        # the number of activities rather than the number of signups
+        _activities_cache = orjson.dumps({
+            name: _activity_summary(name, len(_PARTICIPANTS[idx]), _MAX[idx])
+            for idx, name in enumerate(_ACTIVITY_NAMES)
+        })
+        # Weak, since the compression middleware may re-encode the body
+        _activities_etag = f'W/"{hashlib.blake2s(_activities_cache, digest_size=8).hexdigest()}"'
 
-    # Add student
-    activity["participants"].append(email)
-    return {"message": f"Signed up {email} for {activity_name}"}
+    # no-cache (not no-store) lets clients keep the payload but revalidate it
+    headers = {"ETag": _activities_etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers, _activities_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_activities_cache, media_type="application/json", headers=headers)
 
 
-@app.delete("/activities/{activity_name}/unregister")
-def unregister_from_activity(activity_name: str, email: str):
-    """Unregister a student from an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+@app.get("/activities/{activity_name}/participants")
+async def get_activity_participants(activity_name: ActivityName) -> list[str]:
+    """List the emails of students signed up for an activity"""
+    return sorted(_PARTICIPANTS[_NAME_INDEX[activity_name.value]])
 
-    # Get the specific activity
-    activity = activities[activity_name]
 
-    # Validate student is signed up
-    if email not in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student is not signed up for this activity")
+async def _signup(activity_name, participants, lock, max_participants, email):
+    async with lock:
+        # Validate student is not already signed up
+        if email in participants:
+            raise HTTPException(status_code=400, detail="Student already signed up for this activity")
 
-    # Remove student
-    activity["participants"].remove(email)
+        # Validate activity has room
+        if len(participants) >= max_participants:
+            raise HTTPException(status_code=400, detail="Activity is full")
+
+        # Add student
+        _db.execute(_INSERT_SIGNUP, (activity_name, email))
+        participants.add(email)
+        _invalidate_activities_cache()
+    return {"message": f"Signed up {email} for {activity_name}"}
+
+
+async def _unregister(activity_name, participants, lock, email):
+    async with lock:
+        # Validate student is signed up
+        if email not in participants:
+            raise HTTPException(status_code=400, detail="Student is not signed up for this activity")
+
+        # Remove student
+        _db.execute(_DELETE_SIGNUP, (activity_name, email))
+        participants.discard(email)
+        _invalidate_activities_cache()
     return {"message": f"Unregistered {email} from {activity_name}"}
+
+
+def _make_activity_handlers(idx):
+    """Build signup and unregister handlers bound to one activity"""
+    activity_name = _ACTIVITY_NAMES[idx]
+    participants = _PARTICIPANTS[idx]
+    lock = _LOCKS[idx]
+    max_participants = _MAX[idx]
+
+    async def signup(body: SignupIn):
+        return await _signup(activity_name, participants, lock, max_participants, body.email)
+
+    async def unregister(email: EmailStr):
+        return await _unregister(activity_name, participants, lock, email)
+
+    return signup, unregister
+
+
+# The activities are fixed at startup, so each gets its own routes, matched
+# ahead of the generic {activity_name} ones below. These skip parsing and
+# validating the activity name; the generic routes still handle other casings
+for _idx, _name in enumerate(_ACTIVITY_NAMES):
+    _signup_handler, _unregister_handler = _make_activity_handlers(_idx)
+    app.post(f"/activities/{_name}/signup", include_in_schema=False)(_signup_handler)
+    app.delete(f"/activities/{_name}/unregister", include_in_schema=False)(_unregister_handler)
+
+
+@app.post("/activities/{activity_name}/signup")
+async def signup_for_activity(activity_name: ActivityName, body: SignupIn):
+    """Sign up a student for an activity"""
+    name = activity_name.value
+    idx = _NAME_INDEX[name]
+    return await _signup(name, _PARTICIPANTS[idx], _LOCKS[idx], _MAX[idx], body.email)
+
+
+@app.post("/activities/{activity_name}/signup_batch")
+async def signup_batch_for_activity(activity_name: ActivityName, body: BatchSignupIn):
+    """Sign up several students for an activity, up to its capacity"""
+    name = activity_name.value
+    idx = _NAME_INDEX[name]
+    participants = _PARTICIPANTS[idx]
+
+    added, already, rejected = [], [], []
+    # Mirrors added for O(1) checks against repeats within the batch
+    added_set = set()
+    async with _LOCKS[idx]:
+        spots_left = _MAX[idx] - len(participants)
+        for email in body.emails:
+            if email in participants or email in added_set:
+                already.append(email)
+            elif len(added) < spots_left:
+                added.append(email)
+                added_set.add(email)
+            else:
+                rejected.append(email)
+
+        if added:
+            # One transaction and one cache invalidation for the whole batch
+            with _db:
+                _db.execute("BEGIN")
+                _db.executemany(_INSERT_SIGNUP, [(name, email) for email in added])
+            participants.update(added)
+            _invalidate_activities_cache()
+    return {"added": added, "already": already, "rejected": rejected}
+
+
+@app.delete("/activities/{activity_name}/unregister")
+async def unregister_from_activity(activity_name: ActivityName, email: EmailStr):
+    """Unregister a student from an activity"""
+    name = activity_name.value
+    idx = _NAME_INDEX[name]
+    return await _unregister(name, _PARTICIPANTS[idx], _LOCKS[idx], email)
@@ -4,12 +4,44 @@ document.addEventListener("DOMContentLoaded", () => {
   const signupForm = document.getElementById("signup-form");
   const messageDiv = document.getElementById("message");
 
+  // Validation errors (422) report detail as a list of {msg, ...} objects
+  function errorMessage(result, fallback) {
+    if (Array.isArray(result.detail)) {
+      return result.detail[0]?.msg || fallback;
+    }
+    return result.detail || fallback;
+  }
+
+  // Function to fetch and render one activity's participants
+  async function loadParticipants(section) {
+    const name = section.dataset.activity;
+    const list = section.querySelector(".participants-list");
+
+    try {
+      const response = await fetch(`/activities/${encodeURIComponent(name)}/participants`);
+      const participants = await response.json();
+
+      list.innerHTML = participants.length > 0
+        ? participants.map(p => `<li><span class="participant-email">${p}</span><button class="delete-btn" data-activity="${name}" data-email="${p}" title="Remove participant">✕</button></li>`).join("")
+        : "<li><em>No participants yet</em></li>";
+    } catch (error) {
+      list.innerHTML = "<li><em>Failed to load participants</em></li>";
+      console.error("Error fetching participants:", error);
+    }
+  }
+
   // Function to fetch activities from API
   async function fetchActivities() {
     try {
       const response = await fetch("/activities");
       const activities = await response.json();
 
+      // Remember which participant lists were open so a refresh keeps them open
+      const openActivities = new Set(
+        [...activitiesList.querySelectorAll(".participants-section[open]")]
+          .map(section => section.dataset.activity)
+      );
+
       // Clear loading message
       activitiesList.innerHTML = "";
 
@@ -18,25 +50,26 @@ document.addEventListener("DOMContentLoaded", () => {
         const activityCard = document.createElement("div");
         activityCard.className = "activity-card";
 
-        const spotsLeft = details.max_participants - details.participants.length;
-
-        const participantsList = details.participants.length > 0
-          ? details.participants.map(p => `<li><span class="participant-email">${p}</span><button class="delete-btn" data-activity="${name}" data-email="${p}" title="Remove participant">✕</button></li>`).join("")
-          : "<li><em>No participants yet</em></li>";
-
         activityCard.innerHTML = `
           <h4>${name}</h4>
           <p>${details.description}</p>
           <p><strong>Schedule:</strong> ${details.schedule}</p>
-          <p><strong>Availability:</strong> ${spotsLeft} spots left</p>
-          <div class="participants-section">
-            <strong>Participants (${details.participants.length}):</strong>
-            <ul class="participants-list">
-              ${participantsList}
-            </ul>
-          </div>
+          <p><strong>Availability:</strong> ${details.spots_left} spots left</p>
+          <details class="participants-section" data-activity="${name}">
+            <summary><strong>Participants (${details.participants_count})</strong></summary>
+            <ul class="participants-list"></ul>
+          </details>
         `;
 
+        // Participants are only fetched once their list is opened
+        const section = activityCard.querySelector(".participants-section");
+        section.addEventListener("toggle", () => {
+          if (section.open) {
+            loadParticipants(section);
+          }
+        });
+        section.open = openActivities.has(name);
+
         activitiesList.appendChild(activityCard);
 
         // Add option to select dropdown
@@ -60,9 +93,11 @@ document.addEventListener("DOMContentLoaded", () => {
 
     try {
       const response = await fetch(
-        `/activities/${encodeURIComponent(activity)}/signup?email=${encodeURIComponent(email)}`,
+        `/activities/${encodeURIComponent(activity)}/signup`,
         {
           method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ email }),
         }
       );
 
@@ -75,7 +110,7 @@ document.addEventListener("DOMContentLoaded", () => {
         // Refresh activities list to show the new participant
         fetchActivities();
       } else {
-        messageDiv.textContent = result.detail || "An error occurred";
+        messageDiv.textContent = errorMessage(result, "An error occurred");
         messageDiv.className = "error";
       }
 
@@ -118,7 +153,7 @@ document.addEventListener("DOMContentLoaded", () => {
           }, 5000);
         } else {
           const result = await response.json();
-          messageDiv.textContent = result.detail || "Failed to remove participant";
+          messageDiv.textContent = errorMessage(result, "Failed to remove participant");
           messageDiv.className = "error";
           messageDiv.classList.remove("hidden");
         }
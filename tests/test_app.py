@@ -2,6 +2,7 @@
 Test suite for Mergington High School Activities API
 """
 
+import os
 import pytest
 from fastapi.testclient import TestClient
 from sys import path as sys_path
@@ -10,7 +11,10 @@ from pathlib import Path
 # Add src directory to path for imports
 sys_path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from app import app
+# Use a throwaway database so test signups don't persist between runs
+os.environ["ACTIVITIES_DB"] = ":memory:"
+
+from app import app, open_database, _db
 
 client = TestClient(app)
 
@@ -52,8 +56,67 @@ class TestActivitiesEndpoint:
             assert "description" in activity_details
             assert "schedule" in activity_details
             assert "max_participants" in activity_details
-            assert "participants" in activity_details
-            assert isinstance(activity_details["participants"], list)
+            assert "participants_count" in activity_details
+            assert "spots_left" in activity_details
+            assert "participants" not in activity_details
+
+    def test_get_activities_counts_participants(self):
+        """Test that participant counts and spots left track signups"""
+        before = client.get("/activities").json()["Art Studio"]
+        client.post(
+            "/activities/Art%20Studio/signup",
+            json={"email": "student12@mergington.edu"}
+        )
+        after = client.get("/activities").json()["Art Studio"]
+
+        assert after["participants_count"] == before["participants_count"] + 1
+        assert after["spots_left"] == before["spots_left"] - 1
+        assert after["spots_left"] == after["max_participants"] - after["participants_count"]
+
+    def test_get_activities_returns_304_for_matching_etag(self):
+        """Test that an unchanged /activities payload gets 304 Not Modified"""
+        response = client.get("/activities")
+        assert response.headers["cache-control"] == "no-cache"
+        etag = response.headers["etag"]
+
+        response = client.get("/activities", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_get_activities_returns_304_for_etag_list_and_wildcard(self):
+        """Test that If-None-Match lists and * also get 304 Not Modified"""
+        etag = client.get("/activities").headers["etag"]
+
+        for if_none_match in (f'"other", {etag}', "*"):
+            response = client.get("/activities", headers={"If-None-Match": if_none_match})
+            assert response.status_code == 304
+
+    def test_get_activities_etag_changes_after_signup(self):
+        """Test that a signup changes the /activities ETag"""
+        etag = client.get("/activities").headers["etag"]
+        client.post(
+            "/activities/Debate%20Team/signup",
+            json={"email": "student13@mergington.edu"}
+        )
+
+        response = client.get("/activities", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+
+class TestParticipantsEndpoint:
+    """Test the GET /activities/{activity_name}/participants endpoint"""
+
+    def test_get_participants_returns_list(self):
+        """Test that participants are returned as a list of emails"""
+        response = client.get("/activities/Basketball%20Club/participants")
+        assert response.status_code == 200
+        assert isinstance(response.json(), list)
+
+    def test_get_participants_fails_for_nonexistent_activity(self):
+        """Test that participants lookup fails for nonexistent activity"""
+        response = client.get("/activities/Nonexistent%20Activity/participants")
+        assert response.status_code == 422
 
 
 class TestSignupEndpoint:
@@ -63,7 +126,7 @@ class TestSignupEndpoint:
         """Test that signup returns status 200 on success"""
         response = client.post(
             "/activities/Basketball%20Club/signup",
-            params={"email": "student1@mergington.edu"}
+            json={"email": "student1@mergington.edu"}
         )
         assert response.status_code == 200
 
@@ -71,7 +134,7 @@ class TestSignupEndpoint:
         """Test that signup returns success message"""
         response = client.post(
             "/activities/Basketball%20Club/signup",
-            params={"email": "student2@mergington.edu"}
+            json={"email": "student2@mergington.edu"}
         )
         assert response.status_code == 200
         data = response.json()
@@ -84,22 +147,19 @@ class TestSignupEndpoint:
         email = "student3@mergington.edu"
         client.post(
             "/activities/Tennis%20Team/signup",
-            params={"email": email}
+            json={"email": email}
         )
         
-        response = client.get("/activities")
-        activities = response.json()
-        assert email in activities["Tennis Team"]["participants"]
+        response = client.get("/activities/Tennis%20Team/participants")
+        assert email in response.json()
 
     def test_signup_fails_for_nonexistent_activity(self):
         """Test that signup fails for nonexistent activity"""
         response = client.post(
             "/activities/Nonexistent%20Activity/signup",
-            params={"email": "student@mergington.edu"}
+            json={"email": "student@mergington.edu"}
         )
-        assert response.status_code == 404
-        data = response.json()
-        assert "Activity not found" in data["detail"]
+        assert response.status_code == 422
 
     def test_signup_fails_if_already_registered(self):
         """Test that signup fails if student already registered"""
@@ -108,14 +168,14 @@ class TestSignupEndpoint:
         # First signup succeeds
         response1 = client.post(
             "/activities/Art%20Studio/signup",
-            params={"email": email}
+            json={"email": email}
         )
         assert response1.status_code == 200
         
         # Second signup for same activity fails
         response2 = client.post(
             "/activities/Art%20Studio/signup",
-            params={"email": email}
+            json={"email": email}
         )
         assert response2.status_code == 400
         data = response2.json()
@@ -127,21 +187,125 @@ class TestSignupEndpoint:
         
         response1 = client.post(
             "/activities/Music%20Band/signup",
-            params={"email": email}
+            json={"email": email}
         )
         assert response1.status_code == 200
         
         response2 = client.post(
             "/activities/Debate%20Team/signup",
-            params={"email": email}
+            json={"email": email}
         )
         assert response2.status_code == 200
         
         # Verify student is in both activities
-        response = client.get("/activities")
-        activities = response.json()
-        assert email in activities["Music Band"]["participants"]
-        assert email in activities["Debate Team"]["participants"]
+        response = client.get("/activities/Music%20Band/participants")
+        assert email in response.json()
+        response = client.get("/activities/Debate%20Team/participants")
+        assert email in response.json()
+
+    def test_signup_activity_name_is_case_insensitive(self):
+        """Test that signup matches the activity name regardless of case"""
+        email = "student9@mergington.edu"
+        response = client.post(
+            "/activities/science%20club/signup",
+            json={"email": email}
+        )
+        assert response.status_code == 200
+        assert "Science Club" in response.json()["message"]
+
+        response = client.get("/activities/Science%20Club/participants")
+        assert email in response.json()
+
+    def test_signup_rejects_invalid_email(self):
+        """Test that signup rejects a malformed email address"""
+        response = client.post(
+            "/activities/Basketball%20Club/signup",
+            json={"email": "not-an-email"}
+        )
+        assert response.status_code == 422
+
+
+class TestSignupBatchEndpoint:
+    """Test the POST /activities/{activity_name}/signup_batch endpoint"""
+
+    def test_signup_batch_adds_students(self):
+        """Test that a batch signup adds every new student"""
+        emails = ["batch1@mergington.edu", "batch2@mergington.edu"]
+        response = client.post(
+            "/activities/Science%20Club/signup_batch",
+            json={"emails": emails}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"added": emails, "already": [], "rejected": []}
+
+        response = client.get("/activities/Science%20Club/participants")
+        for email in emails:
+            assert email in response.json()
+
+    def test_signup_batch_reports_already_signed_up(self):
+        """Test that existing and repeated emails are reported as already signed up"""
+        email = "batch3@mergington.edu"
+        client.post(
+            "/activities/Art%20Studio/signup",
+            json={"email": email}
+        )
+
+        response = client.post(
+            "/activities/Art%20Studio/signup_batch",
+            json={"emails": [email, "batch4@mergington.edu", "batch4@mergington.edu"]}
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "added": ["batch4@mergington.edu"],
+            "already": [email, "batch4@mergington.edu"],
+            "rejected": []
+        }
+
+    def test_signup_batch_rejects_students_over_capacity(self):
+        """Test that students beyond the activity's capacity are rejected by both signup paths"""
+        spots_left = client.get("/activities").json()["Tennis Team"]["spots_left"]
+        emails = [f"batch-tennis{i}@mergington.edu" for i in range(spots_left + 2)]
+
+        response = client.post(
+            "/activities/Tennis%20Team/signup_batch",
+            json={"emails": emails}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["added"] == emails[:spots_left]
+        assert data["rejected"] == emails[spots_left:]
+        assert client.get("/activities").json()["Tennis Team"]["spots_left"] == 0
+
+        # A single signup respects the same capacity
+        response = client.post(
+            "/activities/Tennis%20Team/signup",
+            json={"email": "batch-tennis-single@mergington.edu"}
+        )
+        assert response.status_code == 400
+        assert "Activity is full" in response.json()["detail"]
+        assert client.get("/activities").json()["Tennis Team"]["spots_left"] == 0
+
+        for email in data["added"]:
+            client.delete(
+                "/activities/Tennis%20Team/unregister",
+                params={"email": email}
+            )
+
+    def test_signup_batch_rejects_oversized_batch(self):
+        """Test that a batch of more than 100 emails is rejected"""
+        response = client.post(
+            "/activities/Music%20Band/signup_batch",
+            json={"emails": [f"batch-big{i}@mergington.edu" for i in range(101)]}
+        )
+        assert response.status_code == 422
+
+    def test_signup_batch_fails_for_nonexistent_activity(self):
+        """Test that batch signup fails for nonexistent activity"""
+        response = client.post(
+            "/activities/Nonexistent%20Activity/signup_batch",
+            json={"emails": ["batch5@mergington.edu"]}
+        )
+        assert response.status_code == 422
 
 
 class TestUnregisterEndpoint:
@@ -154,7 +318,7 @@ class TestUnregisterEndpoint:
         # First signup
         client.post(
             "/activities/Science%20Club/signup",
-            params={"email": email}
+            json={"email": email}
         )
         
         # Then unregister
@@ -170,7 +334,7 @@ class TestUnregisterEndpoint:
         
         client.post(
             "/activities/Basketball%20Club/signup",
-            params={"email": email}
+            json={"email": email}
         )
         
         response = client.delete(
@@ -190,13 +354,12 @@ class TestUnregisterEndpoint:
         # Signup first
         client.post(
             "/activities/Tennis%20Team/signup",
-            params={"email": email}
+            json={"email": email}
         )
         
         # Verify participant is there
-        response = client.get("/activities")
-        activities = response.json()
-        assert email in activities["Tennis Team"]["participants"]
+        response = client.get("/activities/Tennis%20Team/participants")
+        assert email in response.json()
         
         # Unregister
         client.delete(
@@ -205,9 +368,31 @@ class TestUnregisterEndpoint:
         )
         
         # Verify participant is removed
-        response = client.get("/activities")
-        activities = response.json()
-        assert email not in activities["Tennis Team"]["participants"]
+        response = client.get("/activities/Tennis%20Team/participants")
+        assert email not in response.json()
+
+    def test_unregister_with_signup_email_spelling(self):
+        """Test that unregister normalizes the email the same way as signup"""
+        email = "Student14@MERGINGTON.EDU"
+        for activity in ("Science%20Club", "science%20club"):
+            client.post(
+                f"/activities/{activity}/signup",
+                json={"email": email}
+            )
+
+            response = client.delete(
+                f"/activities/{activity}/unregister",
+                params={"email": email}
+            )
+            assert response.status_code == 200
+
+    def test_unregister_rejects_invalid_email(self):
+        """Test that unregister rejects a malformed email address"""
+        response = client.delete(
+            "/activities/Science%20Club/unregister",
+            params={"email": "not-an-email"}
+        )
+        assert response.status_code == 422
 
     def test_unregister_fails_for_nonexistent_activity(self):
         """Test that unregister fails for nonexistent activity"""
@@ -215,9 +400,7 @@ class TestUnregisterEndpoint:
             "/activities/Nonexistent%20Activity/unregister",
             params={"email": "student@mergington.edu"}
         )
-        assert response.status_code == 404
-        data = response.json()
-        assert "Activity not found" in data["detail"]
+        assert response.status_code == 422
 
     def test_unregister_fails_if_not_registered(self):
         """Test that unregister fails if student not registered"""
@@ -229,6 +412,21 @@ class TestUnregisterEndpoint:
         data = response.json()
         assert "not signed up" in data["detail"]
 
+    def test_unregister_activity_name_is_case_insensitive(self):
+        """Test that unregister matches the activity name regardless of case"""
+        email = "student10@mergington.edu"
+        client.post(
+            "/activities/Debate%20Team/signup",
+            json={"email": email}
+        )
+
+        response = client.delete(
+            "/activities/DEBATE%20TEAM/unregister",
+            params={"email": email}
+        )
+        assert response.status_code == 200
+        assert "Debate Team" in response.json()["message"]
+
 
 class TestRootEndpoint:
     """Test the GET / endpoint"""
@@ -238,3 +436,172 @@ class TestRootEndpoint:
         response = client.get("/", follow_redirects=False)
         assert response.status_code == 307
         assert "/static/index.html" in response.headers["location"]
+
+
+class TestCompression:
+    """Test response compression"""
+
+    def test_activities_gzipped_when_accepted(self):
+        """Test that GET /activities is gzip encoded for gzip clients"""
+        response = client.get("/activities", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Basketball Club" in response.json()
+
+    def test_activities_not_compressed_without_accept_encoding(self):
+        """Test that GET /activities is uncompressed for identity clients"""
+        response = client.get("/activities", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    def test_refused_encoding_is_not_used(self):
+        """Test that an encoding refused with q=0 is not applied"""
+        for path in ("/activities", "/static/index.html"):
+            response = client.get(path, headers={"Accept-Encoding": "gzip;q=0, identity"})
+            assert response.status_code == 200
+            assert "content-encoding" not in response.headers
+
+
+class TestStaticFiles:
+    """Test the /static endpoint"""
+
+    def test_index_html_has_short_cache_lifetime(self):
+        """Test that index.html is only cached briefly"""
+        response = client.get("/static/index.html")
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=60"
+
+    def test_assets_have_long_cache_lifetime(self):
+        """Test that CSS and JS assets are cached for longer"""
+        for asset in ("app.js", "styles.css"):
+            response = client.get(f"/static/{asset}")
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == "public, max-age=86400"
+
+    def test_serves_precompressed_gzip_variant(self):
+        """Test that the precompressed gzip variant is served to gzip clients"""
+        response = client.get("/static/app.js", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/javascript")
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert "fetchActivities" in response.text
+
+    def test_returns_304_for_matching_etag(self):
+        """Test that a matching If-None-Match gets 304 Not Modified"""
+        response = client.get("/static/styles.css")
+        etag = response.headers["etag"]
+
+        response = client.get("/static/styles.css", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        for if_none_match in (f'"other", {etag}', "*"):
+            response = client.get("/static/styles.css", headers={"If-None-Match": if_none_match})
+            assert response.status_code == 304
+
+    def test_missing_file_returns_404(self):
+        """Test that an unknown static file returns 404"""
+        response = client.get("/static/missing.js")
+        assert response.status_code == 404
+
+
+class TestDatabase:
+    """Test the SQLite activity store"""
+
+    @staticmethod
+    def stored_signups(activity):
+        """Return the emails stored in the app's database for an activity"""
+        rows = _db.execute("SELECT activity, email FROM signups WHERE activity = ?", (activity,))
+        return {email for _, email in rows}
+
+    def test_signup_is_written_to_database(self):
+        """Test that a signup through the API is stored in SQLite"""
+        email = "db1@mergington.edu"
+        client.post(
+            "/activities/Music%20Band/signup",
+            json={"email": email}
+        )
+        assert email in self.stored_signups("Music Band")
+
+    def test_signup_batch_is_written_to_database(self):
+        """Test that a batch signup through the API is stored in SQLite"""
+        emails = {"db2@mergington.edu", "db3@mergington.edu"}
+        client.post(
+            "/activities/Music%20Band/signup_batch",
+            json={"emails": sorted(emails)}
+        )
+        assert emails <= self.stored_signups("Music Band")
+
+    def test_unregister_is_written_to_database(self):
+        """Test that an unregister through the API is removed from SQLite"""
+        email = "db4@mergington.edu"
+        client.post(
+            "/activities/Music%20Band/signup",
+            json={"email": email}
+        )
+        assert email in self.stored_signups("Music Band")
+
+        client.delete(
+            "/activities/Music%20Band/unregister",
+            params={"email": email}
+        )
+        assert email not in self.stored_signups("Music Band")
+
+    def test_signups_persist_across_reopen(self, tmp_path):
+        """Test that reopening the database keeps signups and doesn't duplicate activities"""
+        seed = {
+            "Chess Club": {
+                "description": "Play chess",
+                "schedule": "Fridays, 3:30 PM - 5:00 PM",
+                "max_participants": 12
+            }
+        }
+        path = tmp_path / "activities.db"
+
+        db = open_database(path, seed)
+        db.execute("INSERT INTO signups VALUES (?, ?)", ("Chess Club", "student@mergington.edu"))
+        db.close()
+
+        db = open_database(path, seed)
+        assert db.execute("SELECT COUNT(*) FROM activities").fetchone() == (1,)
+        assert db.execute("SELECT activity, email FROM signups").fetchall() == [
+            ("Chess Club", "student@mergington.edu")
+        ]
+        db.close()
+
+    def test_reopen_syncs_activities_to_seed(self, tmp_path):
+        """Test that reopening with a changed seed updates and removes activities"""
+        seed = {
+            "Chess Club": {
+                "description": "Play chess",
+                "schedule": "Fridays, 3:30 PM - 5:00 PM",
+                "max_participants": 12
+            },
+            "Drama Club": {
+                "description": "Act in school plays",
+                "schedule": "Thursdays, 3:30 PM - 5:00 PM",
+                "max_participants": 20
+            }
+        }
+        path = tmp_path / "activities.db"
+
+        db = open_database(path, seed)
+        db.execute("INSERT INTO signups VALUES (?, ?)", ("Chess Club", "chess@mergington.edu"))
+        db.execute("INSERT INTO signups VALUES (?, ?)", ("Drama Club", "drama@mergington.edu"))
+        db.close()
+
+        del seed["Drama Club"]
+        seed["Chess Club"] = {
+            "description": "Play and study chess",
+            "schedule": "Mondays, 3:30 PM - 5:00 PM",
+            "max_participants": 8
+        }
+        db = open_database(path, seed)
+        assert db.execute("SELECT * FROM activities").fetchall() == [
+            ("Chess Club", "Play and study chess", "Mondays, 3:30 PM - 5:00 PM", 8)
+        ]
+        assert db.execute("SELECT activity, email FROM signups").fetchall() == [
+            ("Chess Club", "chess@mergington.edu")
+        ]
+        db.close()